@@ -2,20 +2,26 @@ import sys
 import time
 import threading
 import random
+import itertools
 import os
-
-import pyautogui
-import keyboard
+import codecs
+import collections
+import functools
+import re
 
 from PyQt6.QtCore import (
     Qt,
     QTimer,
+    QThread,
     pyqtSignal,
+    pyqtSlot,
     QObject,
     QEvent,
+    QMetaObject,
 )
 from PyQt6.QtGui import (
     QFont,
+    QFontDatabase,
     QKeySequence,
     QColor,
     QPalette,
@@ -40,10 +46,203 @@ from PyQt6.QtWidgets import (
     QLineEdit,
 )
 
+# pyautogui 导入时会连带加载 pygetwindow / pyscreeze / Pillow 等，keyboard 也要初始化钩子，
+# 两者都推迟到窗口首次绘制之后由 _load_input_backends 导入，启动时先把界面显示出来
+pyautogui = None
+keyboard = None
+
+
+# ================= 工具函数 =================
+
+_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB", "PB")
+
+
+def _format_size(num_bytes: int) -> str:
+    # 每 10 个二进制位进一级单位，直接由位长算出单位下标
+    idx = min((num_bytes.bit_length() - 1) // 10, len(_SIZE_UNITS) - 1) if num_bytes > 0 else 0
+    if idx == 0:
+        return f"{num_bytes}B"
+    return f"{num_bytes / (1 << (10 * idx)):.2f}{_SIZE_UNITS[idx]}"
+
+
+# ================= 工具：Win32 接口 =================
+
+if sys.platform == "win32":
+    import ctypes
+    from ctypes import wintypes
+
+    _user32 = ctypes.WinDLL("user32", use_last_error=True)
+
+    EVENT_SYSTEM_FOREGROUND = 0x0003
+    WINEVENT_OUTOFCONTEXT = 0x0000
+
+    _WINEVENTPROC = ctypes.WINFUNCTYPE(
+        None,
+        wintypes.HANDLE,  # hWinEventHook
+        wintypes.DWORD,   # event
+        wintypes.HWND,    # hwnd
+        wintypes.LONG,    # idObject
+        wintypes.LONG,    # idChild
+        wintypes.DWORD,   # idEventThread
+        wintypes.DWORD,   # dwmsEventTime
+    )
+
+    _user32.SetWinEventHook.argtypes = (
+        wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE, _WINEVENTPROC,
+        wintypes.DWORD, wintypes.DWORD, wintypes.DWORD,
+    )
+    _user32.SetWinEventHook.restype = wintypes.HANDLE
+    _user32.UnhookWinEvent.argtypes = (wintypes.HANDLE,)
+    _user32.UnhookWinEvent.restype = wintypes.BOOL
+    _user32.GetWindowTextLengthW.argtypes = (wintypes.HWND,)
+    _user32.GetWindowTextLengthW.restype = ctypes.c_int
+    _user32.GetWindowTextW.argtypes = (wintypes.HWND, wintypes.LPWSTR, ctypes.c_int)
+    _user32.GetWindowTextW.restype = ctypes.c_int
+    _user32.GetForegroundWindow.argtypes = ()
+    _user32.GetForegroundWindow.restype = wintypes.HWND
+
+    INPUT_KEYBOARD = 1
+    KEYEVENTF_KEYUP = 0x0002
+    KEYEVENTF_UNICODE = 0x0004
+
+    # Shift / Ctrl / Alt / 左右 Win
+    _MODIFIER_VKS = (0x10, 0x11, 0x12, 0x5B, 0x5C)
+
+    class _KEYBDINPUT(ctypes.Structure):
+        _fields_ = (
+            ("wVk", wintypes.WORD),
+            ("wScan", wintypes.WORD),
+            ("dwFlags", wintypes.DWORD),
+            ("time", wintypes.DWORD),
+            ("dwExtraInfo", ctypes.c_size_t),
+        )
+
+    class _MOUSEINPUT(ctypes.Structure):
+        _fields_ = (
+            ("dx", wintypes.LONG),
+            ("dy", wintypes.LONG),
+            ("mouseData", wintypes.DWORD),
+            ("dwFlags", wintypes.DWORD),
+            ("time", wintypes.DWORD),
+            ("dwExtraInfo", ctypes.c_size_t),
+        )
+
+    class _INPUTUNION(ctypes.Union):
+        # 包含 MOUSEINPUT 以保证 sizeof(INPUT) 与系统一致，否则 SendInput 直接失败
+        _fields_ = (("ki", _KEYBDINPUT), ("mi", _MOUSEINPUT))
+
+    class _INPUT(ctypes.Structure):
+        _fields_ = (("type", wintypes.DWORD), ("u", _INPUTUNION))
+
+    # 一对 KEYEVENTF_UNICODE 按下/抬起事件的字节模板，发送时只需逐字符填写 wScan；
+    # 偏移以 16 位字为单位，按结构体字段计算，32/64 位进程都适用
+    _UNICODE_PAIR = bytes(_INPUT(INPUT_KEYBOARD, _INPUTUNION(ki=_KEYBDINPUT(dwFlags=KEYEVENTF_UNICODE)))) + bytes(
+        _INPUT(INPUT_KEYBOARD, _INPUTUNION(ki=_KEYBDINPUT(dwFlags=KEYEVENTF_UNICODE | KEYEVENTF_KEYUP)))
+    )
+    _SCAN_WORD = (_INPUT.u.offset + _INPUTUNION.ki.offset + _KEYBDINPUT.wScan.offset) // 2
+    _INPUT_WORDS = ctypes.sizeof(_INPUT) // 2
+
+    _user32.SendInput.argtypes = (wintypes.UINT, ctypes.POINTER(_INPUT), ctypes.c_int)
+    _user32.SendInput.restype = wintypes.UINT
+    _user32.GetAsyncKeyState.argtypes = (ctypes.c_int,)
+    _user32.GetAsyncKeyState.restype = wintypes.SHORT
+    _user32.MapVirtualKeyW.argtypes = (wintypes.UINT, wintypes.UINT)
+    _user32.MapVirtualKeyW.restype = wintypes.UINT
+
+    MAPVK_VK_TO_VSC = 0
+
+    # 控制字符 -> (虚拟键码, 扫描码)，扫描码启动时查一次即可
+    _CONTROL_VKS = {
+        ch: (vk, _user32.MapVirtualKeyW(vk, MAPVK_VK_TO_VSC))
+        for ch, vk in (("\n", 0x0D), ("\t", 0x09), ("\x08", 0x08), ("\x1b", 0x1B))
+    }
+else:
+    _user32 = None
+
+
+def _window_title(hwnd) -> str:
+    """读取窗口标题（仅 Windows），没有标题时返回空字符串"""
+    length = _user32.GetWindowTextLengthW(hwnd)
+    if length <= 0:
+        return ""
+    buf = ctypes.create_unicode_buffer(length + 1)
+    _user32.GetWindowTextW(hwnd, buf, length + 1)
+    return buf.value
+
+
+def _load_input_backends():
+    """导入模拟输入用的 pyautogui / keyboard，只有第一次调用会真正导入"""
+    global pyautogui, keyboard
+    if keyboard is not None:
+        return
+    import pyautogui
+    import keyboard
+    pyautogui.FAILSAFE = False
+
+
+def _safe_remove_hotkey(handle):
+    """注销 keyboard 快捷键，忽略已失效等错误"""
+    try:
+        keyboard.remove_hotkey(handle)
+    except Exception:
+        pass
+
+
+def _foreground_window():
+    """
+    当前前台窗口 (句柄, 标题)；Windows 下直接读窗口句柄，不经过 pyautogui / pygetwindow，
+    GetForegroundWindow 不会抛异常，也就无需 try。
+    非 Windows 平台句柄恒为 0，没有前台窗口时标题为 None。
+    """
+    if _user32 is None:
+        try:
+            return 0, pyautogui.getActiveWindowTitle()
+        except Exception:
+            return 0, None
+    hwnd = _user32.GetForegroundWindow()
+    if not hwnd:
+        return 0, None
+    return hwnd, _window_title(hwnd)
+
+
+def _modifiers_down() -> bool:
+    """是否有修饰键处于按下状态（仅 Windows）"""
+    return any(_user32.GetAsyncKeyState(vk) & 0x8000 for vk in _MODIFIER_VKS)
+
+
+def _send_unicode(text: str) -> bool:
+    """
+    用一次 SendInput 注入整段文本（KEYEVENTF_UNICODE，仅 Windows），
+    每个 UTF-16 码元一对按下/抬起事件，emoji 等代理对会拆成两个码元依次发送。
+    返回 False 表示被系统拒绝（如目标窗口权限更高）。
+    """
+    units = memoryview(text.encode("utf-16-le")).cast("H")
+    # 先按模板复制出整段事件，再用带步长的切片一次写入所有按下 / 抬起事件的 wScan，
+    # 不必逐个访问 ctypes 结构体字段
+    buf = bytearray(_UNICODE_PAIR * len(units))
+    words = memoryview(buf).cast("H")
+    words[_SCAN_WORD::2 * _INPUT_WORDS] = units
+    words[_SCAN_WORD + _INPUT_WORDS::2 * _INPUT_WORDS] = units
+    inputs = (_INPUT * (2 * len(units))).from_buffer(buf)
+    return _user32.SendInput(len(inputs), inputs, ctypes.sizeof(_INPUT)) > 0
+
+
+def _send_key(vk: int, scan: int) -> bool:
+    """用一次 SendInput 发送一个虚拟键的按下/抬起（仅 Windows），返回是否成功"""
+    inputs = (_INPUT * 2)()
+    down, up = inputs
+    down.type = up.type = INPUT_KEYBOARD
+    down.u.ki.wVk = up.u.ki.wVk = vk
+    down.u.ki.wScan = up.u.ki.wScan = scan
+    up.u.ki.dwFlags = KEYEVENTF_KEYUP
+    return _user32.SendInput(2, inputs, ctypes.sizeof(_INPUT)) > 0
+
 
 # ================= 自定义：可拖入文件的文本框 =================
 
 class DroppableTextEdit(QTextEdit):
+    _READ_CHUNK = 128 * 1024
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setAcceptDrops(True)
@@ -72,7 +271,7 @@ class DroppableTextEdit(QTextEdit):
     def _load_file(self, path: str):
         try:
             size_bytes = os.path.getsize(path)
-            size_str = self._format_size(size_bytes)
+            size_str = _format_size(size_bytes)
 
             # 大小判断：超过 1000 字节弹窗确认
             if size_bytes > 1000:
@@ -86,32 +285,20 @@ class DroppableTextEdit(QTextEdit):
                 if reply != QMessageBox.StandardButton.Yes:
                     return
 
-            with open(path, "rb") as f:
-                data = f.read()
-
-            # 尝试用 utf-8 解码，无法解码的部分丢弃
-            try:
-                text = data.decode("utf-8")
-            except UnicodeDecodeError:
-                text = data.decode("utf-8", errors="ignore")
+            # 按 128KiB 分块读取并增量解码（utf-8，无法解码的部分丢弃），
+            # 避免整个文件的原始字节和解码结果同时驻留内存
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+            parts = []
+            with open(path, "rb", buffering=self._READ_CHUNK) as f:
+                while chunk := f.read(self._READ_CHUNK):
+                    parts.append(decoder.decode(chunk))
+            parts.append(decoder.decode(b"", final=True))
 
-            self.setPlainText(text)
+            self.setPlainText("".join(parts))
 
         except Exception as e:
             QMessageBox.critical(self, "读取失败", f"无法读取文件：\n{e}")
 
-    @staticmethod
-    def _format_size(num_bytes: int) -> str:
-        size = float(num_bytes)
-        for unit in ["B", "KB", "MB", "GB", "TB"]:
-            if size < 1024:
-                if unit == "B":
-                    return f"{int(size)}{unit}"
-                else:
-                    return f"{size:.2f}{unit}"
-            size /= 1024.0
-        return f"{size:.2f}PB"
-
 
 # ================= 自定义：快捷键编辑框 =================
 
@@ -124,6 +311,14 @@ class HotkeyEdit(QLineEdit):
     """
     sequenceCommitted = pyqtSignal(str, bool)  # (sequence_str, has_main_key)
 
+    # (修饰位, 显示名)，顺序即显示顺序
+    _MOD_TABLE = (
+        (Qt.KeyboardModifier.ControlModifier, "Ctrl"),
+        (Qt.KeyboardModifier.ShiftModifier, "Shift"),
+        (Qt.KeyboardModifier.AltModifier, "Alt"),
+        (Qt.KeyboardModifier.MetaModifier, "Win"),
+    )
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setReadOnly(True)
@@ -182,16 +377,8 @@ class HotkeyEdit(QLineEdit):
             self.clearFocus()
             return
 
-        modifiers = []
         mods = event.modifiers()
-        if mods & Qt.KeyboardModifier.ControlModifier:
-            modifiers.append("Ctrl")
-        if mods & Qt.KeyboardModifier.ShiftModifier:
-            modifiers.append("Shift")
-        if mods & Qt.KeyboardModifier.AltModifier:
-            modifiers.append("Alt")
-        if mods & Qt.KeyboardModifier.MetaModifier:
-            modifiers.append("Win")
+        modifiers = [name for bit, name in self._MOD_TABLE if mods & bit]
 
         main_key = ""
         if key not in (
@@ -206,25 +393,41 @@ class HotkeyEdit(QLineEdit):
                 main_key = main_key.upper()
             self._has_main_key = True
 
-        parts = modifiers.copy()
         if main_key:
-            parts.append(main_key)
+            modifiers.append(main_key)
 
-        display = "+".join(parts)
+        display = "+".join(modifiers)
         self._current_sequence = display
-        self.setText(display)
+        # 重复按同一组合（如按住修饰键自动重复）时不触发多余的重绘
+        if display != self.text():
+            self.setText(display)
 
     def setOccupied(self, occupied: bool):
-        pal = self.palette()
-        if occupied:
-            pal.setColor(QPalette.ColorRole.Text, QColor("#EF4444"))
-        else:
-            pal.setColor(QPalette.ColorRole.Text, QColor("#D0D4DA"))
-        self.setPalette(pal)
+        # 颜色由样式表的 QLineEdit[occupied=...] 规则决定，只需切换属性并重新 polish
+        value = "true" if occupied else "false"
+        if self.property("occupied") == value:
+            return
+        self.setProperty("occupied", value)
+        style = self.style()
+        style.unpolish(self)
+        style.polish(self)
 
 
 # ================= 工具：打字线程 =================
 
+# 把文本切成 (连续可见字符, 单个控制字符) 两类片段：
+# 可见字符每段最多 40 个、整段发送；换行、制表符等控制字符逐个特殊处理
+_SEGMENT_RE = re.compile(r"([^\x00-\x1f]{1,40})|(.)", re.DOTALL)
+
+# 需要模拟按键的控制字符 -> pyautogui 按键名，其余控制字符忽略
+_CONTROL_KEYS = {
+    "\n": "enter",
+    "\t": "tab",
+    "\x08": "backspace",
+    "\x1b": "esc",
+}
+
+
 class TypingWorker(QObject):
     progress_changed = pyqtSignal(int)  # 0~100
     finished = pyqtSignal()
@@ -232,39 +435,101 @@ class TypingWorker(QObject):
     error = pyqtSignal(str)
     focus_paused = pyqtSignal()  # 焦点变化导致的自动暂停
 
-    def __init__(self, text, base_delay_ms, use_random, rand_min_ms, rand_max_ms, target_window_title=None):
-        super().__init__()
-        self.text = text
-        self.base_delay_ms = base_delay_ms
-        self.use_random = use_random
-        self.rand_min_ms = rand_min_ms
-        self.rand_max_ms = rand_max_ms
-        if self.rand_max_ms < self.rand_min_ms:
-            self.rand_min_ms, self.rand_max_ms = self.rand_max_ms, self.rand_min_ms
+    # 进度信号的最短间隔（秒），界面刷新频率与打字速度脱钩
+    _PROGRESS_INTERVAL = 0.05
 
-        self._stop_flag = False
-        self._pause_flag = False
-
-        self.target_window_title = target_window_title
+    def __init__(self):
+        super().__init__()
+        # configure 排入、run 按顺序取出的输入任务，每项带有该次输入自己的停止 / 暂停事件
+        self._jobs = collections.deque()
+
+        # 当前（最近一次 configure 的）输入的事件，stop / pause / resume 作用于它们；
+        # 未暂停时 _resume_event 为 set，暂停时 clear，打字循环在其上阻塞等待
+        self._stop_event = threading.Event()
+        self._resume_event = threading.Event()
+        self._resume_event.set()
+
+        self.target_window_title = None
+        # 目标窗口句柄（仅 Windows），前台窗口比较优先用句柄，0 表示未知
+        self.target_hwnd = 0
+
+        # 前台窗口切换钩子（仅 Windows），由回调异步更新 _focus_ok
+        self._focus_ok = True
+        self._focus_hook = None
+        self._focus_proc = None
+
+    def configure(
+        self, text, base_delay_ms, use_random, rand_min_ms, rand_max_ms, target_window_title=None, target_hwnd=0
+    ):
+        """
+        准备下一次输入（UI 线程调用），之后排队调用 run 执行。
+        每次换一组新的停止 / 暂停事件：中止后立即重新开始时，上一次 run 可能还在退出，
+        它仍持有自己的旧事件，不会被本次输入重新唤醒。
+        """
+        if rand_max_ms < rand_min_ms:
+            rand_min_ms, rand_max_ms = rand_max_ms, rand_min_ms
+
+        self._stop_event = threading.Event()
+        self._resume_event = threading.Event()
+        self._resume_event.set()
+        self.set_target_window(target_window_title, target_hwnd)
+
+        self._jobs.append(
+            (text, base_delay_ms, use_random, rand_min_ms, rand_max_ms, self._stop_event, self._resume_event)
+        )
 
     def stop(self):
-        self._stop_flag = True
+        self._stop_event.set()
+        self._resume_event.set()
 
     def pause(self):
-        self._pause_flag = True
+        self._resume_event.clear()
 
     def resume(self):
-        self._pause_flag = False
+        self._resume_event.set()
 
-    def set_target_window(self, title):
-        """更新目标窗口标题，解决切换窗口后无法恢复的问题"""
+    def set_target_window(self, title, hwnd=0):
+        """更新目标窗口标题（及句柄），解决切换窗口后无法恢复的问题"""
         self.target_window_title = title
+        self.target_hwnd = hwnd
+        self._focus_ok = True
+
+    def install_focus_hook(self):
+        """
+        注册前台窗口切换事件，替代逐块轮询活动窗口标题。
+        回调依赖调用线程的消息循环，因此要在 UI 线程调用，并在同一线程 remove_focus_hook。
+        注册失败或非 Windows 平台时 _check_focus 退回轮询。
+        """
+        if _user32 is None or self._focus_hook:
+            return
+        self._focus_proc = _WINEVENTPROC(self._on_foreground_changed)
+        self._focus_hook = _user32.SetWinEventHook(
+            EVENT_SYSTEM_FOREGROUND,
+            EVENT_SYSTEM_FOREGROUND,
+            None,
+            self._focus_proc,
+            0,
+            0,
+            WINEVENT_OUTOFCONTEXT,
+        )
 
-    @staticmethod
-    def _is_fast_char(ch: str) -> bool:
-        if ch in ("\n", "\t"):
-            return False
-        return ord(ch) >= 32
+    def remove_focus_hook(self):
+        if self._focus_hook:
+            _user32.UnhookWinEvent(self._focus_hook)
+        self._focus_hook = None
+        self._focus_proc = None
+
+    def _on_foreground_changed(self, hook, event, hwnd, id_object, id_child, thread_id, event_time):
+        self._focus_ok = self._is_target_window(hwnd)
+
+    def _is_target_window(self, hwnd, title=None) -> bool:
+        """前台窗口是否为目标窗口：句柄相同直接通过，否则比较标题（未给出标题时按句柄读取）"""
+        if hwnd and hwnd == self.target_hwnd:
+            return True
+        # 句柄不同再比较标题：同一程序可能用另一个顶层窗口承载输入
+        if title is None:
+            title = _window_title(hwnd) if hwnd else ""
+        return bool(title) and title == self.target_window_title
 
     def _safe_write(self, text: str):
         try:
@@ -273,114 +538,350 @@ class TypingWorker(QObject):
             pyautogui.write(text, interval=0)
 
     def _fast_type_chunk(self, chunk: str):
-        if chunk:
-            self._safe_write(chunk)
-
-    def _check_focus(self):
-        if not self.target_window_title or self._stop_flag or self._pause_flag:
+        if not chunk:
+            return
+        # Windows 下整块一次 SendInput；按住修饰键时交给 keyboard（它会先临时释放修饰键）
+        if _user32 is not None and not _modifiers_down() and _send_unicode(chunk):
             return
+        self._safe_write(chunk)
 
-        try:
-            current_title = pyautogui.getActiveWindowTitle()
-        except Exception:
+    def _check_focus(self, stop_event, resume_event):
+        if (
+            not self.target_window_title
+            or stop_event.is_set()
+            or not resume_event.is_set()
+        ):
             return
 
+        if self._focus_hook:
+            # 已注册前台窗口钩子：直接读取回调维护的标志
+            focus_ok = self._focus_ok
+        else:
+            focus_ok = self._is_target_window(*_foreground_window())
+
         # 无焦点或切换到其它窗口则自动暂停
-        if not current_title or current_title != self.target_window_title:
-            self._pause_flag = True
+        if not focus_ok:
+            resume_event.clear()
             self.focus_paused.emit()
 
+    def _wait_ready(self, stop_event, resume_event) -> bool:
+        """发送下一块前等待暂停结束（焦点已由调用方检查），返回 False 表示已中止"""
+        if stop_event.is_set():
+            return False
+
+        # 暂停期间阻塞等待，resume / stop 会立即唤醒；带超时以防与 stop 交错时错过唤醒
+        while not resume_event.wait(0.5):
+            if stop_event.is_set():
+                break
+
+        return not stop_event.is_set()
+
+    @pyqtSlot()
     def run(self):
         try:
-            length = len(self.text)
+            (
+                text, base_delay_ms, use_random, rand_min_ms, rand_max_ms, stop_event, resume_event
+            ) = self._jobs.popleft()
+
+            length = len(text)
             if length == 0:
                 self.finished.emit()
                 return
 
-            i = 0
-            fast_mode = (self.base_delay_ms == 0 and not self.use_random)
-            max_chunk = 40
-
-            while i < length:
-                if self._stop_flag:
-                    self.stopped.emit()
-                    return
-
-                self._check_focus()
-
-                while self._pause_flag and not self._stop_flag:
-                    time.sleep(0.05)
-
-                if self._stop_flag:
-                    self.stopped.emit()
-                    return
-
-                if fast_mode and self._is_fast_char(self.text[i]):
-                    chunk_chars = []
-                    while (
-                        i < length
-                        and len(chunk_chars) < max_chunk
-                        and self._is_fast_char(self.text[i])
-                    ):
-                        chunk_chars.append(self.text[i])
-                        i += 1
-                    self._fast_type_chunk("".join(chunk_chars))
+            fast_mode = (base_delay_ms == 0 and not use_random)
+            # 有延迟时也合并连续字符一次发送，累计延迟达到该值才真正 sleep，
+            # 既保留逐字节奏，又避免低延迟下每个字符都付出一次发送开销
+            min_sleep_ms = 15
+            if use_random:
+                delays = map(base_delay_ms.__add__, self._iter_random_delays(rand_min_ms, rand_max_ms))
+            else:
+                delays = itertools.repeat(base_delay_ms)
+
+            # 进度条只有 0~100 共 101 个状态，百分比变化时才跨线程发信号；
+            # 预先算出下一个百分点对应的位置，多数块只需一次整数比较。
+            # 同时限制发信号的频率，快速输入时不会每个百分点都唤醒一次 UI 线程，
+            # 最终的 100% 由 finished 负责
+            next_emit_pos = 0
+            next_emit_time = 0.0
+            emitted = -1
+
+            def emit_progress(pos):
+                """发出 pos 对应的百分比（与上次相同则不发），并算出下一个百分点的位置"""
+                nonlocal emitted, next_emit_pos
+                percent = pos * 100 // length
+                if percent != emitted:
+                    emitted = percent
+                    self.progress_changed.emit(percent)
+                # 满足 pos * 100 // length > percent 的最小 pos
+                next_emit_pos = -(-(percent + 1) * length // 100)
+
+            for m in _SEGMENT_RE.finditer(text):
+                chunk, ctrl = m.groups()
+                if ctrl is not None:
+                    pieces = ((ctrl, next(delays)),)
+                elif fast_mode:
+                    pieces = ((chunk, 0),)
+                elif base_delay_ms >= min_sleep_ms:
+                    # 每个字符都要单独 sleep，直接逐字符遍历，无需按累计延迟切分
+                    pieces = zip(chunk, delays)
                 else:
-                    ch = self.text[i]
-                    self._type_char(ch)
-                    i += 1
-
-                percent = int(i / length * 100)
-                self.progress_changed.emit(percent)
+                    pieces = self._split_by_delay(chunk, delays, min_sleep_ms)
+
+                pos = m.start()
+                for piece, delay_ms in pieces:
+                    self._check_focus(stop_event, resume_event)
+                    if stop_event.is_set() or not resume_event.is_set():
+                        # 即将暂停或中止：补发被限频略过的最新进度，暂停期间和中止后进度条不落后
+                        emit_progress(pos)
+                    if not self._wait_ready(stop_event, resume_event):
+                        self.stopped.emit()
+                        return
+
+                    if ctrl is not None:
+                        self._type_char(piece)
+                    else:
+                        self._fast_type_chunk(piece)
+                    pos += len(piece)
+
+                    if pos >= next_emit_pos:
+                        now = time.monotonic()
+                        if now >= next_emit_time:
+                            emit_progress(pos)
+                            next_emit_time = now + self._PROGRESS_INTERVAL
 
-                if not fast_mode:
-                    delay_ms = self.base_delay_ms
-                    if self.use_random:
-                        delay_ms += random.randint(self.rand_min_ms, self.rand_max_ms)
                     if delay_ms > 0:
-                        time.sleep(delay_ms / 1000.0)
+                        # 中止时立即醒来，不必等完整个延迟
+                        stop_event.wait(delay_ms / 1000.0)
 
             self.finished.emit()
         except Exception as e:
             self.error.emit(str(e))
 
+    @staticmethod
+    def _split_by_delay(chunk: str, delays, min_sleep_ms: int):
+        """把一段连续可见字符按累计延迟切成小块，逐块产出 (小块, 发送后的延迟)"""
+        start = 0
+        delay_ms = 0
+        for j in range(len(chunk)):
+            delay_ms += next(delays)
+            if delay_ms >= min_sleep_ms:
+                yield chunk[start:j + 1], delay_ms
+                start = j + 1
+                delay_ms = 0
+        if start < len(chunk):
+            yield chunk[start:], delay_ms
+
+    @staticmethod
+    def _iter_random_delays(rand_min_ms: int, rand_max_ms: int):
+        """按块预生成随机延迟，避免逐字符调用 random.randint"""
+        population = range(rand_min_ms, rand_max_ms + 1)
+        while True:
+            yield from random.choices(population, k=8192)
+
     def _type_char(self, ch: str):
-        # 换行
-        if ch == "\n":
-            try:
-                keyboard.write("\n", delay=0)
-            except Exception:
-                pyautogui.press("enter")
+        key = _CONTROL_KEYS.get(ch)
+        if key is None:
+            # _SEGMENT_RE 只把控制字符交给这里，未列出的控制字符直接忽略
             return
 
-        # 制表符
-        if ch == "\t":
+        # Windows 下直接 SendInput 虚拟键，与普通文本走同一条注入路径
+        if _user32 is not None and not _modifiers_down() and _send_key(*_CONTROL_VKS[ch]):
+            return
+
+        # 换行、制表符优先用 keyboard 输入，失败再模拟按键
+        if ch in "\n\t":
             try:
-                keyboard.write("\t", delay=0)
+                keyboard.write(ch, delay=0)
+                return
             except Exception:
-                pyautogui.press("tab")
-            return
+                pass
+        pyautogui.press(key)
+
+
+# ================= UI：样式 =================
+
+# 窗口底色、文字色、选中色由调色板提供（见 _md3_palette），
+# 样式表只保留各控件特有的规则，减少每个控件 polish 时需要匹配的选择器
+_MD3_QSS = """
+QGroupBox {
+    border: 1px solid #2A2E33;
+    border-radius: 12px;
+    margin-top: 18px;
+    padding: 10px;
+    background-color: #181C20;
+    font-weight: 500;
+}
+QGroupBox::title {
+    subcontrol-origin: margin;
+    subcontrol-position: top left;
+    padding: 0 6px;
+    color: #D0D4DA;
+}
+QTextEdit {
+    border-radius: 10px;
+    border: 1px solid #30363D;
+    padding: 8px;
+    background: #0F1115;
+}
+QSlider::groove:horizontal {
+    border: 1px solid #30363D;
+    height: 6px;
+    border-radius: 3px;
+    background: #1F2933;
+}
+QSlider::handle:horizontal {
+    background: #3B82F6;
+    border-radius: 8px;
+    width: 18px;
+    margin: -5px 0;
+}
+QSlider::sub-page:horizontal {
+    background: #2563EB;
+    border-radius: 3px;
+}
+QSpinBox {
+    border-radius: 6px;
+    border: 1px solid #30363D;
+    padding: 2px 6px;
+    background: #0F1115;
+    color: #E3E7EB;
+}
+QCheckBox {
+    spacing: 6px;
+}
+QCheckBox::indicator {
+    width: 18px;
+    height: 18px;
+    border-radius: 6px;
+    border: 1px solid #3B82F6;
+    background: transparent;
+}
+QCheckBox::indicator:checked {
+    background: #3B82F6;
+}
+QPushButton {
+    border-radius: 999px;
+    border: 1px solid #3B82F6;
+    padding: 8px 14px;
+    background: #1F2937;
+    color: #E3E7EB;
+}
+QPushButton:hover {
+    background: #2B3543;
+}
+QPushButton:pressed {
+    background: #111827;
+}
+QPushButton:disabled {
+    background: #1F2937;
+    color: #6B7280;
+    border-color: #4B5563;
+}
+QProgressBar {
+    border-radius: 8px;
+    border: 1px solid #30363D;
+    background: #0F1115;
+    text-align: center;
+    color: #E3E7EB;
+}
+QProgressBar::chunk {
+    background-color: #22C55E;
+    border-radius: 8px;
+}
+QToolButton {
+    border-radius: 999px;
+    padding: 4px 8px;
+    background: #1F2933;
+    border: 1px solid #30363D;
+}
+QToolButton:checked {
+    background: #3B82F6;
+    border-color: #3B82F6;
+    color: #FFFFFF;
+}
+QLineEdit {
+    border-radius: 6px;
+    border: 1px solid #30363D;
+    padding: 4px 8px;
+    background: #0F1115;
+}
+QLineEdit[occupied="true"] {
+    color: #EF4444;
+}
+QLineEdit[occupied="false"] {
+    color: #D0D4DA;
+}
+"""
+
+
+def _md3_palette() -> QPalette:
+    palette = QPalette()
+    palette.setColor(QPalette.ColorRole.Window, QColor("#101316"))
+    palette.setColor(QPalette.ColorRole.WindowText, QColor("#D0D4DA"))
+    palette.setColor(QPalette.ColorRole.Base, QColor("#0F1115"))
+    palette.setColor(QPalette.ColorRole.Text, QColor("#E3E7EB"))
+    palette.setColor(QPalette.ColorRole.Highlight, QColor("#3B82F6"))
+    return palette
+
+
+_PREFERRED_MONO = None
+
+
+def _pick_mono(default: str) -> str:
+    """优先使用 Consolas；查询字体库开销较大，结果只计算一次"""
+    global _PREFERRED_MONO
+    if _PREFERRED_MONO is None:
+        _PREFERRED_MONO = "Consolas" if "Consolas" in QFontDatabase.families() else default
+    return _PREFERRED_MONO
 
-        code = ord(ch)
-        # 简单处理几个常见控制字符
-        if code < 32:
-            if code == 8:
-                pyautogui.press("backspace")
-            elif code == 27:
-                pyautogui.press("esc")
-            return
 
-        # 普通字符 / 中文 / emoji
-        self._safe_write(ch)
+# ================= UI：主窗口 =================
 
+# 快捷键各部分（小写）-> keyboard 库使用的规范名，未列出的按原样小写
+_HOTKEY_CANON = {
+    "ctrl": "ctrl",
+    "control": "ctrl",
+    "shift": "shift",
+    "alt": "alt",
+    "menu": "alt",
+    "win": "windows",
+    "windows": "windows",
+    "meta": "windows",
+    "super": "windows",
+}
+
+# 快捷键各部分（小写）-> 界面显示名
+_HOTKEY_DISPLAY = {
+    "ctrl": "Ctrl",
+    "control": "Ctrl",
+    "shift": "Shift",
+    "alt": "Alt",
+    "menu": "Alt",
+    "win": "Win",
+    "windows": "Win",
+    "meta": "Win",
+    "super": "Win",
+}
+
+# 多处复用的状态文字，统一为驻留的模块常量
+_S_IDLE = sys.intern("等待操作")
+_S_READY = sys.intern("准备开始输入")
+_S_TYPING = sys.intern("输入中")
+_S_PAUSED = sys.intern("已暂停")
+_S_CANCELED = sys.intern("已取消")
+_S_STOPPED = sys.intern("已中止")
+_S_DONE = sys.intern("输入完成")
 
-# ================= UI：主窗口 =================
 
 class MainWindow(QMainWindow):
-    STATE_IDLE = 0
-    STATE_COUNTDOWN = 1
-    STATE_TYPING = 2
-    STATE_PAUSED = 3
+    # 状态取不同的二进制位，"属于某几种状态之一"只需一次按位与
+    STATE_IDLE = 1
+    STATE_COUNTDOWN = 2
+    STATE_TYPING = 4
+    STATE_PAUSED = 8
+
+    _RUNNING_MASK = STATE_TYPING | STATE_COUNTDOWN  # 正在输入或即将开始
+    _ACTIVE_MASK = STATE_TYPING | STATE_PAUSED  # 已有 worker 在运行
 
     def __init__(self):
         super().__init__()
@@ -388,11 +889,38 @@ class MainWindow(QMainWindow):
         self.resize(980, 620)
 
         self.state = self.STATE_IDLE
-        self.current_countdown_ms = 0
-        self.current_resume_ms = 0
+        self.countdown_deadline = 0.0
+        self._countdown_tenths = -1
+        self.resume_deadline = 0.0
+
+        # 打字 worker 与线程只创建一次：每次开始输入时 configure，再排队调用 run
+        self.typing_worker = TypingWorker()
+        self.typing_thread = QThread(self)
+        self.typing_worker.moveToThread(self.typing_thread)
+        self.typing_worker.progress_changed.connect(self._on_typing_progress)
+        self.typing_worker.finished.connect(self._on_typing_finished)
+        self.typing_worker.stopped.connect(self._on_typing_stopped)
+        self.typing_worker.error.connect(self._on_typing_error)
+        self.typing_worker.focus_paused.connect(self._on_focus_paused)
+        self.typing_thread.finished.connect(self.typing_worker.deleteLater)
+        self.typing_thread.start()
+        # 未经 closeEvent 直接退出（如注销 / 关机）时也要先结束线程
+        QApplication.instance().aboutToQuit.connect(self._shutdown_typing_thread)
 
-        self.typing_thread = None
-        self.typing_worker = None
+        # 已排队但结束信号（finished / stopped / error）尚未收到的 run：
+        # _run_active 表示当前这次 run 是否仍未收尾，_stale_runs 为已被取消、信号需要跳过的旧 run 个数
+        self._run_active = False
+        self._stale_runs = 0
+
+        # 最近一次显示的输入进度，重复的百分比不再刷新界面
+        self._last_percent = -1
+
+        # 反复刷新的状态文字模板，预先绑定 format
+        self._fmt_status = "当前状态：{}".format
+        self._fmt_progress = "输入中（{}%）".format
+        self._fmt_countdown = "倒计时中：{:.1f} 秒后开始输入".format
+        self._fmt_resume = "{:.1f} 秒后继续输入...".format
+        self._fmt_err = "[错误] {}".format
 
         self.hotkey_str = "ctrl+shift+t"
         self.hotkey_handle = None
@@ -400,24 +928,82 @@ class MainWindow(QMainWindow):
 
         self._build_ui()
         self._apply_md3_style()
+        self._set_idle = self._make_set_idle()
+
+        # 开始 / 继续时读取的输入参数，控件创建后绑定一次取值方法
+        self._get_text = self.text_edit.toPlainText
+        self._get_speed = self.speed_spin.value
+        self._get_use_random = self.random_checkbox.isChecked
+        self._get_rand_min = self.rand_min_spin.value
+        self._get_rand_max = self.rand_max_spin.value
+        self._get_start_delay = self.start_delay_spin.value
+
+        # 输入出错提示框只创建一次，非模态显示，出错时复用
+        self._err_box = QMessageBox(self)
+        self._err_box.setIcon(QMessageBox.Icon.Critical)
+        self._err_box.setWindowTitle("错误")
+        self._err_box.setWindowModality(Qt.WindowModality.NonModal)
 
         QApplication.instance().installEventFilter(self)
 
-        self._register_hotkey()
-        self._set_idle("等待操作", 0)
+        # 本窗口句柄（仅 Windows），判断"焦点是否在本工具上"时直接比较整数
+        self._self_hwnd = int(self.winId()) if _user32 is not None else 0
+
+        # 快捷键注册需要 keyboard，等窗口第一次绘制完成后再进行，见 paintEvent
+        self._hotkey_pending = True
+        self._set_idle(_S_IDLE, 0)
 
     # ---------- 公共小工具 ----------
 
     def _reset_timers(self):
         self.countdown_timer.stop()
-        self.resume_timer.stop()
+        self._stop_resume_timers()
 
-    def _set_idle(self, text="等待操作", progress=None, is_error=False):
-        self._reset_timers()
-        self.state = self.STATE_IDLE
-        self.btn_pause.setText("暂停")
-        self.btn_start.setEnabled(True)
-        self._update_status(text, progress, is_error)
+    def _stop_resume_timers(self):
+        self.resume_timer.stop()
+        self.label_timer.stop()
+
+    def _on_label_tick(self):
+        state = self.state
+        if state == self.STATE_COUNTDOWN:
+            self._refresh_countdown_label()
+        elif state == self.STATE_PAUSED:
+            self._on_resume_tick()
+        else:
+            self.label_timer.stop()
+
+    def _make_set_idle(self):
+        """
+        生成 _set_idle：控件创建后调用一次，把回到空闲状态要用的控件方法
+        预先绑定到闭包里，之后每次调用不再逐个查找属性。
+        """
+        reset_timers = self._reset_timers
+        set_pause_text = self.btn_pause.setText
+        enable_start = self.btn_start.setEnabled
+        update_status = self._update_status
+        remove_focus_hook = self.typing_worker.remove_focus_hook
+        idle = self.STATE_IDLE
+
+        def _set_idle(text=_S_IDLE, progress=None, is_error=False):
+            reset_timers()
+            self._last_percent = -1
+            remove_focus_hook()
+            self.state = idle
+            set_pause_text("暂停")
+            enable_start(True)
+            update_status(text, progress, is_error)
+
+        return _set_idle
+
+    # ---------- 首次绘制后延迟初始化 ----------
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        # 零延时的排队调用仍会排在首次绘制之前，这里用一个非零定时器，
+        # 保证导入输入库、注册快捷键发生在窗口画出来之后
+        if self._hotkey_pending:
+            self._hotkey_pending = False
+            QTimer.singleShot(50, self._register_hotkey)
 
     # ---------- 事件过滤：快捷键输入框失焦 ----------
 
@@ -464,7 +1050,7 @@ class MainWindow(QMainWindow):
         left_layout = QVBoxLayout(left_group)
         self.text_edit = DroppableTextEdit()
         self.text_edit.setPlaceholderText("粘贴文字或拖入待复制文件......")
-        font = QFont("Consolas" if "Consolas" in QFont().families() else self.font().family(), 11)
+        font = QFont(_pick_mono(self.font().family()), 11)
         self.text_edit.setFont(font)
         left_layout.addWidget(self.text_edit)
 
@@ -572,142 +1158,48 @@ class MainWindow(QMainWindow):
         status_layout = QVBoxLayout(status_group)
 
         self.status_label = QLabel("当前状态：等待操作")
+        self._status_is_error = None
+        self._last_status = None
         status_layout.addWidget(self.status_label)
 
         self.progress_bar = QProgressBar()
         self.progress_bar.setRange(0, 100)
         self.progress_bar.setValue(0)
+        # 进度条只由 _update_status 写入，保留一份副本，读取时不必再调用 value()
+        self._progress_value = 0
         status_layout.addWidget(self.progress_bar)
 
         right_panel.addWidget(status_group)
         right_panel.addStretch(1)
 
-        # 计时器
+        # 开始倒计时 / 继续输入：各用一个精确的单次定时器负责到点触发
         self.countdown_timer = QTimer(self)
-        self.countdown_timer.timeout.connect(self._on_countdown_tick)
+        self.countdown_timer.setSingleShot(True)
+        self.countdown_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.countdown_timer.timeout.connect(self._on_countdown_timeout)
 
         self.resume_timer = QTimer(self)
-        self.resume_timer.timeout.connect(self._on_resume_tick)
+        self.resume_timer.setSingleShot(True)
+        self.resume_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.resume_timer.timeout.connect(self._on_resume_timeout)
+
+        # 两种倒计时不会同时出现，共用一个低频定时器刷新倒计时文字，按状态分派
+        self.label_timer = QTimer(self)
+        self.label_timer.setInterval(250)
+        self.label_timer.setTimerType(Qt.TimerType.CoarseTimer)
+        self.label_timer.timeout.connect(self._on_label_tick)
 
     # ---------- 样式 ----------
 
     def _apply_md3_style(self):
         app = QApplication.instance()
-        if app is not None:
+        if app is not None and not getattr(app, "_md3_applied", False):
             app.setStyle("Fusion")
+            # setStyle 会重置调色板，必须在其后设置
+            app.setPalette(_md3_palette())
+            app._md3_applied = True
 
-        self.setStyleSheet("""
-            QMainWindow {
-                background-color: #101316;
-            }
-            QGroupBox {
-                border: 1px solid #2A2E33;
-                border-radius: 12px;
-                margin-top: 18px;
-                padding: 10px;
-                background-color: #181C20;
-                font-weight: 500;
-            }
-            QGroupBox::title {
-                subcontrol-origin: margin;
-                subcontrol-position: top left;
-                padding: 0 6px;
-                color: #D0D4DA;
-            }
-            QTextEdit {
-                border-radius: 10px;
-                border: 1px solid #30363D;
-                padding: 8px;
-                background: #0F1115;
-                color: #E3E7EB;
-                selection-background-color: #3B82F6;
-            }
-            QLabel {
-                color: #D0D4DA;
-            }
-            QSlider::groove:horizontal {
-                border: 1px solid #30363D;
-                height: 6px;
-                border-radius: 3px;
-                background: #1F2933;
-            }
-            QSlider::handle:horizontal {
-                background: #3B82F6;
-                border-radius: 8px;
-                width: 18px;
-                margin: -5px 0;
-            }
-            QSlider::sub-page:horizontal {
-                background: #2563EB;
-                border-radius: 3px;
-            }
-            QSpinBox {
-                border-radius: 6px;
-                border: 1px solid #30363D;
-                padding: 2px 6px;
-                background: #0F1115;
-                color: #E3E7EB;
-            }
-            QCheckBox {
-                spacing: 6px;
-            }
-            QCheckBox::indicator {
-                width: 18px;
-                height: 18px;
-                border-radius: 6px;
-                border: 1px solid #3B82F6;
-                background: transparent;
-            }
-            QCheckBox::indicator:checked {
-                background: #3B82F6;
-            }
-            QPushButton {
-                border-radius: 999px;
-                border: 1px solid #3B82F6;
-                padding: 8px 14px;
-                background: #1F2937;
-                color: #E3E7EB;
-            }
-            QPushButton:hover {
-                background: #2B3543;
-            }
-            QPushButton:pressed {
-                background: #111827;
-            }
-            QPushButton:disabled {
-                background: #1F2937;
-                color: #6B7280;
-                border-color: #4B5563;
-            }
-            QProgressBar {
-                border-radius: 8px;
-                border: 1px solid #30363D;
-                background: #0F1115;
-                text-align: center;
-                color: #E3E7EB;
-            }
-            QProgressBar::chunk {
-                background-color: #22C55E;
-                border-radius: 8px;
-            }
-            QToolButton {
-                border-radius: 999px;
-                padding: 4px 8px;
-                background: #1F2933;
-                border: 1px solid #30363D;
-            }
-            QToolButton:checked {
-                background: #3B82F6;
-                border-color: #3B82F6;
-                color: #FFFFFF;
-            }
-            QLineEdit {
-                border-radius: 6px;
-                border: 1px solid #30363D;
-                padding: 4px 8px;
-                background: #0F1115;
-            }
-        """)
+        self.setStyleSheet(_MD3_QSS)
 
         self._set_hotkey_display(self.hotkey_occupied)
 
@@ -730,23 +1222,18 @@ class MainWindow(QMainWindow):
     # ---------- 热键显示/注册 ----------
 
     @staticmethod
+    @functools.lru_cache(maxsize=1)
     def _to_readable_hotkey(hotkey_str: str) -> str:
+        # 同一个快捷键会被反复渲染，缓存最近一次的结果
         parts = []
         for raw in hotkey_str.split("+"):
             raw = raw.strip()
             if not raw:
                 continue
-            low = raw.lower()
-            if low in ("ctrl", "control"):
-                parts.append("Ctrl")
-            elif low == "shift":
-                parts.append("Shift")
-            elif low in ("alt", "menu"):
-                parts.append("Alt")
-            elif low in ("win", "windows", "meta", "super"):
-                parts.append("Win")
-            else:
-                parts.append(raw.upper() if len(raw) == 1 else raw.capitalize())
+            name = _HOTKEY_DISPLAY.get(raw.lower())
+            if name is None:
+                name = raw.upper() if len(raw) == 1 else raw.capitalize()
+            parts.append(name)
         return "+".join(parts)
 
     def _display_hotkey_text(self, hotkey_str: str, occupied: bool) -> str:
@@ -761,30 +1248,13 @@ class MainWindow(QMainWindow):
 
     @staticmethod
     def _canonicalize_sequence(seq_str: str) -> str:
-        parts = []
-        for p in seq_str.split("+"):
-            p = p.strip()
-            if not p:
-                continue
-            low = p.lower()
-            if low in ("ctrl", "control"):
-                parts.append("ctrl")
-            elif low == "shift":
-                parts.append("shift")
-            elif low in ("alt", "menu"):
-                parts.append("alt")
-            elif low in ("win", "windows", "meta", "super"):
-                parts.append("windows")
-            else:
-                parts.append(low)
-        return "+".join(parts)
+        lows = (p.strip().lower() for p in seq_str.split("+"))
+        return "+".join(_HOTKEY_CANON.get(low, low) for low in lows if low)
 
     def _register_hotkey(self):
+        _load_input_backends()
         if self.hotkey_handle is not None:
-            try:
-                keyboard.remove_hotkey(self.hotkey_handle)
-            except Exception:
-                pass
+            _safe_remove_hotkey(self.hotkey_handle)
             self.hotkey_handle = None
 
         try:
@@ -836,8 +1306,11 @@ class MainWindow(QMainWindow):
         self._register_hotkey()
 
     def _on_hotkey_trigger(self):
-        QTimer.singleShot(0, self._on_hotkey_trigger_gui)
+        # keyboard 在自己的钩子线程里回调，这里只投递一个排队调用就立即返回，
+        # 不阻塞钩子线程；真正的处理在 UI 线程的事件循环中执行
+        QMetaObject.invokeMethod(self, "_on_hotkey_trigger_gui", Qt.ConnectionType.QueuedConnection)
 
+    @pyqtSlot()
     def _on_hotkey_trigger_gui(self):
         if getattr(self, "hotkey_edit", None) is not None:
             he = self.hotkey_edit
@@ -845,19 +1318,36 @@ class MainWindow(QMainWindow):
                 return
         self._start_typing_immediately_from_hotkey()
 
+    # ---------- 前台窗口 ----------
+
+    def _is_self_window(self, hwnd, title) -> bool:
+        """前台窗口是否是本工具：有句柄时比较句柄，否则退回比较标题"""
+        if hwnd:
+            return hwnd == self._self_hwnd
+        return title == self.windowTitle()
+
     # ---------- 状态更新 ----------
 
     def _update_status(self, text, progress=None, is_error=False):
         if progress is None:
-            progress = self.progress_bar.value()
-        self.status_label.setText(f"当前状态：{text}")
+            progress = self._progress_value
+        # 与当前显示完全相同（如重复的焦点变化提示）时直接返回
+        status = (text, progress, is_error)
+        if status == self._last_status:
+            return
+        self._last_status = status
+        self.status_label.setText(self._fmt_status(text))
+        self._progress_value = progress
         self.progress_bar.setValue(progress)
-        self.status_label.setStyleSheet("color: #EF4444;" if is_error else "color: #D0D4DA;")
+        # setStyleSheet 每次都会重新解析并 polish，只在错误状态切换时调用
+        if is_error != self._status_is_error:
+            self._status_is_error = is_error
+            self.status_label.setStyleSheet("color: #EF4444;" if is_error else "color: #D0D4DA;")
 
     # ---------- 控制按钮逻辑 ----------
 
     def _on_start_clicked(self):
-        if self.state in (self.STATE_TYPING, self.STATE_COUNTDOWN):
+        if self.state & self._RUNNING_MASK:
             self._cancel_typing()
         elif self.state == self.STATE_PAUSED:
             self._cancel_typing()
@@ -866,25 +1356,26 @@ class MainWindow(QMainWindow):
             self._start_typing(skip_countdown=False)
 
     def _on_pause_clicked(self):
-        if self.state == self.STATE_TYPING and self.typing_worker:
-            self.resume_timer.stop()
+        if self.state == self.STATE_TYPING:
+            self._stop_resume_timers()
             self.typing_worker.pause()
             self.state = self.STATE_PAUSED
             self.btn_pause.setText("继续")
-            self._update_status("已暂停", self.progress_bar.value())
-        elif self.state == self.STATE_PAUSED and self.typing_worker:
+            self._update_status(_S_PAUSED, self._progress_value)
+        elif self.state == self.STATE_PAUSED:
             if self.resume_timer.isActive():
-                self.resume_timer.stop()
-                self._update_status("已暂停", self.progress_bar.value())
+                self._stop_resume_timers()
+                self._update_status(_S_PAUSED, self._progress_value)
             else:
-                delay_ms = self.start_delay_spin.value()
+                delay_ms = self._get_start_delay()
                 if delay_ms <= 0:
                     self._resume_typing(from_hotkey=False)
                 else:
-                    self.current_resume_ms = delay_ms
-                    self.resume_timer.start(100)
-                    sec = self.current_resume_ms / 1000.0
-                    self._update_status(f"{sec:.1f} 秒后继续输入...", self.progress_bar.value())
+                    self.resume_deadline = time.monotonic() + delay_ms / 1000.0
+                    self.resume_timer.start(delay_ms)
+                    self.label_timer.start()
+                    sec = delay_ms / 1000.0
+                    self._update_status(self._fmt_resume(sec), self._progress_value)
 
     def _on_stop_clicked(self):
         self._cancel_typing()
@@ -892,93 +1383,84 @@ class MainWindow(QMainWindow):
     # ---------- 暂停后恢复 ----------
 
     def _on_resume_tick(self):
-        step = 100
-        self.current_resume_ms -= step
-        if self.current_resume_ms <= 0:
-            self.resume_timer.stop()
-            self._resume_typing(from_hotkey=False)
-        else:
-            sec = self.current_resume_ms / 1000.0
-            self._update_status(f"{sec:.1f} 秒后继续输入...", self.progress_bar.value())
+        sec = self.resume_deadline - time.monotonic()
+        if sec > 0:
+            self._update_status(self._fmt_resume(sec), self._progress_value)
+
+    def _on_resume_timeout(self):
+        self.label_timer.stop()
+        self._resume_typing(from_hotkey=False)
 
     def _resume_typing(self, from_hotkey: bool = False):
-        if not (self.typing_worker and self.state == self.STATE_PAUSED):
+        if self.state != self.STATE_PAUSED:
             return
 
-        try:
-            current_win = pyautogui.getActiveWindowTitle()
-        except Exception:
-            current_win = None
+        hwnd, current_win = _foreground_window()
 
         if not current_win:
-            self._update_status("无法获取输入焦点(无窗口) - 恢复失败", self.progress_bar.value(), is_error=True)
-            self.resume_timer.stop()
+            self._update_status("无法获取输入焦点(无窗口) - 恢复失败", self._progress_value, is_error=True)
+            self._stop_resume_timers()
             return
 
-        if current_win == self.windowTitle():
-            self._update_status("输入焦点不能是本工具 - 继续暂停中", self.progress_bar.value(), is_error=True)
-            self.resume_timer.stop()
+        if self._is_self_window(hwnd, current_win):
+            self._update_status("输入焦点不能是本工具 - 继续暂停中", self._progress_value, is_error=True)
+            self._stop_resume_timers()
             return
 
         # 更新目标窗口为当前窗口
-        self.typing_worker.set_target_window(current_win)
+        self.typing_worker.set_target_window(current_win, hwnd)
 
         self.typing_worker.resume()
         self.state = self.STATE_TYPING
         self.btn_pause.setText("暂停")
-        tip = "输入中（快捷键继续）" if from_hotkey else "输入中"
-        self._update_status(tip, self.progress_bar.value())
+        tip = "输入中（快捷键继续）" if from_hotkey else _S_TYPING
+        self._update_status(tip, self._progress_value)
 
     # ---------- 开始 / 倒计时 / 取消 ----------
 
     def _start_typing(self, skip_countdown=False):
-        if not self.text_edit.toPlainText():
-            self._update_status("没有要输入的文本", self.progress_bar.value(), is_error=True)
+        if not self._get_text():
+            self._update_status("没有要输入的文本", self._progress_value, is_error=True)
             return
 
-        self._update_status("准备开始输入", self.progress_bar.value(), is_error=False)
+        self._update_status(_S_READY, self._progress_value, is_error=False)
 
         if skip_countdown:
             self._begin_typing()
             return
 
-        delay_ms = self.start_delay_spin.value()
+        delay_ms = self._get_start_delay()
         if delay_ms <= 0:
             self._begin_typing()
         else:
             self.state = self.STATE_COUNTDOWN
-            self.current_countdown_ms = delay_ms
-            sec = self.current_countdown_ms / 1000.0
-            self._update_status(
-                f"倒计时中：{sec:.1f} 秒后开始输入",
-                self.progress_bar.value(),
-            )
-            self.countdown_timer.start(100)
+            self.countdown_deadline = time.monotonic() + delay_ms / 1000.0
+            self._countdown_tenths = -1
+            self._refresh_countdown_label()
+            self.countdown_timer.start(delay_ms)
+            self.label_timer.start()
             self.btn_start.setEnabled(False)
 
-    def _on_countdown_tick(self):
+    def _refresh_countdown_label(self):
+        remaining = self.countdown_deadline - time.monotonic()
+        # 只在显示的十分之一秒数变化时才重绘
+        tenths = max(round(remaining * 10), 1)
+        if tenths == self._countdown_tenths:
+            return
+        self._countdown_tenths = tenths
+        sec = tenths / 10.0
+        self._update_status(self._fmt_countdown(sec), self._progress_value)
+
+    def _on_countdown_timeout(self):
+        self.label_timer.stop()
         if self.state != self.STATE_COUNTDOWN:
-            self.countdown_timer.stop()
             self.btn_start.setEnabled(True)
             return
-
-        step = 100
-        self.current_countdown_ms -= step
-        if self.current_countdown_ms <= 0:
-            self.countdown_timer.stop()
-            self._begin_typing()
-        else:
-            sec = self.current_countdown_ms / 1000.0
-            self._update_status(
-                f"倒计时中：{sec:.1f} 秒后开始输入",
-                self.progress_bar.value(),
-            )
+        self._begin_typing()
 
     def _begin_typing(self):
-        try:
-            target_window_title = pyautogui.getActiveWindowTitle()
-        except Exception:
-            target_window_title = None
+        _load_input_backends()
+        target_hwnd, target_window_title = _foreground_window()
 
         if not target_window_title:
             self._set_idle("输入焦点不正确（无窗口焦点）- 启动失败", 0, is_error=True)
@@ -990,104 +1472,143 @@ class MainWindow(QMainWindow):
 
         self.state = self.STATE_TYPING
         self.btn_pause.setText("暂停")
-        self.resume_timer.stop()
-        self._update_status("输入中", self.progress_bar.value())
+        self._stop_resume_timers()
+        self._last_percent = -1
+        self._update_status(_S_TYPING, self._progress_value)
         self.btn_start.setEnabled(False)
 
-        text = self.text_edit.toPlainText()
-        base_delay_ms = self.speed_spin.value()
-        use_random = self.random_checkbox.isChecked()
-        rand_min = self.rand_min_spin.value()
-        rand_max = self.rand_max_spin.value()
+        text = self._get_text()
+        base_delay_ms = self._get_speed()
+        use_random = self._get_use_random()
+        rand_min = self._get_rand_min()
+        rand_max = self._get_rand_max()
 
-        self.typing_worker = TypingWorker(
+        self._run_active = True
+
+        self.typing_worker.configure(
             text,
             base_delay_ms,
             use_random,
             rand_min,
             rand_max,
             target_window_title=target_window_title,
+            target_hwnd=target_hwnd,
         )
-
-        self.typing_worker.progress_changed.connect(self._on_typing_progress)
-        self.typing_worker.finished.connect(self._on_typing_finished)
-        self.typing_worker.stopped.connect(self._on_typing_stopped)
-        self.typing_worker.error.connect(self._on_typing_error)
-        self.typing_worker.focus_paused.connect(self._on_focus_paused)
-
-        self.typing_thread = threading.Thread(target=self.typing_worker.run, daemon=True)
-        self.typing_thread.start()
+        self.typing_worker.install_focus_hook()
+        QMetaObject.invokeMethod(self.typing_worker, "run", Qt.ConnectionType.QueuedConnection)
 
     def _cancel_typing(self):
         if self.state == self.STATE_IDLE:
             return
 
         if self.state == self.STATE_COUNTDOWN:
-            self._set_idle("已取消", self.progress_bar.value())
-        elif self.state in (self.STATE_TYPING, self.STATE_PAUSED):
-            if self.typing_worker:
-                self.typing_worker.stop()
-            self._set_idle("已中止", self.progress_bar.value())
+            self._set_idle(_S_CANCELED, self._progress_value)
+        elif self.state & self._ACTIVE_MASK:
+            self.typing_worker.stop()
+            if self._run_active:
+                # 取消即作废：它迟到的信号（包括 stopped）不能影响之后的倒计时或新一次输入
+                self._stale_runs += 1
+                self._run_active = False
+            self._set_idle(_S_STOPPED, self._progress_value)
 
     def _start_typing_immediately_from_hotkey(self):
-        if self.state == self.STATE_PAUSED and self.typing_worker:
+        if self.state == self.STATE_PAUSED:
             self._resume_typing(from_hotkey=True)
-        elif self.state in (self.STATE_TYPING, self.STATE_COUNTDOWN):
+        elif self.state & self._RUNNING_MASK:
             self._cancel_typing()
         else:
             self._start_typing(skip_countdown=True)
 
     # ---------- 打字线程回调 ----------
 
+    def _accept_worker_signal(self, terminal: bool = False) -> bool:
+        """
+        worker 的信号是否属于当前这次输入。被取消的 run 可能还在退出，
+        它迟到的信号都排在之后的 run 之前到达，收到它的结束信号前一律跳过。
+        terminal 表示 finished / stopped / error 这类结束信号。
+        """
+        if self._stale_runs:
+            if terminal:
+                self._stale_runs -= 1
+            return False
+        if terminal:
+            self._run_active = False
+        return True
+
     def _on_typing_progress(self, percent):
-        self._update_status(f"输入中（{percent}%）", percent)
+        if not self._accept_worker_signal() or percent == self._last_percent:
+            return
+        self._last_percent = percent
+        if self.state != self.STATE_TYPING:
+            # 暂停 / 中止前补发的进度：只更新进度条，保留当前的暂停等提示文字
+            text, _, is_error = self._last_status
+            self._update_status(text, percent, is_error)
+            return
+        self._update_status(self._fmt_progress(percent), percent)
 
     def _on_typing_finished(self):
-        self._set_idle("输入完成", 100)
+        if not self._accept_worker_signal(terminal=True):
+            return
+        self._set_idle(_S_DONE, 100)
 
     def _on_typing_stopped(self):
-        self._set_idle("已中止", self.progress_bar.value())
+        if not self._accept_worker_signal(terminal=True):
+            return
+        self._set_idle(_S_STOPPED, self._progress_value)
 
     def _on_typing_error(self, msg):
-        self._set_idle(f"[错误] {msg}", self.progress_bar.value(), is_error=True)
-        QMessageBox.critical(self, "错误", f"输入过程中出现错误：{msg}")
+        if not self._accept_worker_signal(terminal=True):
+            return
+        self._set_idle(self._fmt_err(msg), self._progress_value, is_error=True)
+        self._err_box.setText(f"输入过程中出现错误：{msg}")
+        self._err_box.show()
+        self._err_box.raise_()
 
     def _on_focus_paused(self):
-        if self.state not in (self.STATE_TYPING, self.STATE_PAUSED):
+        if not self._accept_worker_signal():
+            return
+        if not self.state & self._ACTIVE_MASK:
             return
 
-        self.resume_timer.stop()
+        self._stop_resume_timers()
         self.state = self.STATE_PAUSED
         self.btn_pause.setText("继续")
 
-        try:
-            current_win = pyautogui.getActiveWindowTitle()
-        except Exception:
-            current_win = None
+        hwnd, current_win = _foreground_window()
 
         if not current_win:
-            self._update_status("输入焦点不正确（无窗口焦点）- 已暂停", self.progress_bar.value(), is_error=True)
-        elif current_win == self.windowTitle():
-            self._update_status("输入焦点不能是本工具 - 继续暂停中", self.progress_bar.value(), is_error=True)
+            self._update_status("输入焦点不正确（无窗口焦点）- 已暂停", self._progress_value, is_error=True)
+        elif self._is_self_window(hwnd, current_win):
+            self._update_status("输入焦点不能是本工具 - 继续暂停中", self._progress_value, is_error=True)
         else:
-            self._update_status("窗口焦点变化，已临时暂停", self.progress_bar.value())
+            self._update_status("窗口焦点变化，已临时暂停", self._progress_value)
 
     # ---------- 关闭 ----------
 
+    def _shutdown_typing_thread(self):
+        """中止正在进行的输入并等待打字线程退出；线程归属本窗口，窗口销毁前必须调用，可重复调用"""
+        if not self.typing_thread.isRunning():
+            return
+        # 关闭后不会再处理 stopped 信号，_set_idle 不会执行，前台窗口钩子要在这里（UI 线程）注销
+        self.typing_worker.remove_focus_hook()
+        self.typing_worker.stop()
+        self.typing_thread.quit()
+        self.typing_thread.wait()
+
     def closeEvent(self, event):
-        try:
-            if self.hotkey_handle is not None:
-                keyboard.remove_hotkey(self.hotkey_handle)
-        except Exception:
-            pass
+        self._shutdown_typing_thread()
+
+        # 注销快捷键会同步卸载 keyboard 的底层钩子，可能耗时数十毫秒；
+        # 放到后台守护线程，窗口立即关闭，进程退出时系统也会回收钩子
+        if self.hotkey_handle is not None:
+            threading.Thread(target=_safe_remove_hotkey, args=(self.hotkey_handle,), daemon=True).start()
+            self.hotkey_handle = None
         event.accept()
 
 
 # ================= main =================
 
 def main():
-    pyautogui.FAILSAFE = False
-
     app = QApplication(sys.argv)
     app.setApplicationName("延迟输入工具")
 